@@ -1,22 +1,31 @@
 import argparse
 import csv
 import datetime as dt
+import email.policy
 import logging
 import os
 import smtplib
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from email.message import EmailMessage
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from sites.amazon import search_amazon
+from sites.exclude import compile_excludes, contains_exclude
 from sites.rakuten import search_rakuten
 from sites.yahoo import search_yahoo
 from sites.types import Item
 
 
+BATCH_CONCURRENCY = 4
+
+
 def parse_exclude_words(raw: Optional[str]) -> List[str]:
     if not raw:
         return []
@@ -42,32 +51,135 @@ def safe_int(value) -> Optional[int]:
         return None
 
 
-def send_email(
-    smtp_host: str,
-    smtp_port: int,
-    smtp_user: str,
-    smtp_password: str,
+class MinBackoffRetry(Retry):
+    # urllib3 retries the first failure immediately, which cannot clear a
+    # per-second rate limit; always wait at least one second.
+    def get_backoff_time(self) -> float:
+        return max(1.0, super().get_backoff_time())
+
+
+def build_session() -> requests.Session:
+    session = requests.Session()
+    # Retry rate limits and transient 5xx after 1 s, then 2 s. Retry-After is
+    # ignored so a large value cannot stall the run for hours. POST is not
+    # retried by default, so the signed Amazon call is sent once.
+    retries = MinBackoffRetry(
+        total=2,
+        backoff_factor=1.0,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def collect_result(future: Future, site: str) -> Optional[Item]:
+    try:
+        return future.result()
+    except Exception as exc:
+        logging.info("%s search failed: %s", site, exc)
+        return None
+
+
+def fetch_items(
+    session: requests.Session,
+    product_name: str,
+    exclude_words: List[str],
+) -> Tuple[Optional[Item], Optional[Item], Optional[Item]]:
+    # Heuristic: results for an excluded product name would mostly be filtered
+    # out anyway, so skip every site rather than fill the row from just some.
+    if contains_exclude(product_name, compile_excludes(exclude_words)):
+        logging.info("Product name %s matches exclude words; skip search.", product_name)
+        return None, None, None
+
+    # Each site is independent I/O; run them concurrently on the shared session.
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        rakuten_future = executor.submit(
+            search_rakuten, session, product_name, exclude_words
+        )
+        yahoo_future = executor.submit(
+            search_yahoo, session, product_name, exclude_words
+        )
+        amazon_future = executor.submit(
+            search_amazon, session, product_name, exclude_words
+        )
+    return (
+        collect_result(rakuten_future, "Rakuten"),
+        collect_result(amazon_future, "Amazon"),
+        collect_result(yahoo_future, "Yahoo"),
+    )
+
+
+def read_product_names(path: Path) -> List[str]:
+    # utf-8-sig drops the BOM that Windows editors such as Notepad may write.
+    with path.open(encoding="utf-8-sig") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def build_row(
+    product_name: str,
+    rakuten_item: Optional[Item],
+    amazon_item: Optional[Item],
+    yahoo_item: Optional[Item],
+) -> List[str]:
+    name = ""
+    image_url = ""
+    for candidate in (rakuten_item, amazon_item, yahoo_item):
+        if candidate and candidate.name:
+            name = candidate.name
+            image_url = candidate.image_url
+            break
+
+    return [
+        name,
+        product_name,
+        image_url,
+        *item_to_row(rakuten_item),
+        *item_to_row(amazon_item),
+        *item_to_row(yahoo_item),
+    ]
+
+
+def write_csv(path: Path, header: List[str], rows: List[List[str]]) -> None:
+    # utf-8-sig keeps Excel happy without the slow, lossy shift_jis codec.
+    with path.open("w", encoding="utf-8-sig", newline="", buffering=1 << 20) as f:
+        csv.writer(f).writerows([header, *rows])
+
+
+def build_email(
     smtp_from: str,
     smtp_to: List[str],
     subject: str,
     body: str,
     attachment_path: Path,
-) -> None:
+) -> EmailMessage:
     msg = EmailMessage()
     msg["From"] = smtp_from
     msg["To"] = ", ".join(smtp_to)
     msg["Subject"] = subject
     msg.set_content(body)
 
-    with attachment_path.open("rb") as f:
-        data = f.read()
+    # Attach the file bytes as-is so the BOM and CRLF line endings written by
+    # write_csv() survive; Japanese text is base64-encoded either way.
     msg.add_attachment(
-        data,
+        attachment_path.read_bytes(),
         maintype="text",
         subtype="csv",
         filename=attachment_path.name,
+        params={"charset": "utf-8"},
     )
+    return msg
 
+
+@contextmanager
+def open_smtp(
+    smtp_host: str,
+    smtp_port: int,
+    smtp_user: str,
+    smtp_password: str,
+) -> Iterator[smtplib.SMTP]:
     with smtplib.SMTP(smtp_host, smtp_port, timeout=30) as server:
         server.ehlo()
         if os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes"):
@@ -75,14 +187,58 @@ def send_email(
             server.ehlo()
         if smtp_user:
             server.login(smtp_user, smtp_password)
-        server.send_message(msg)
+        yield server
+
+
+def send_email(
+    server: smtplib.SMTP,
+    smtp_from: str,
+    smtp_to: List[str],
+    msg: EmailMessage,
+) -> None:
+    # Serialize once with the SMTP policy (CRLF) and hand raw bytes to sendmail.
+    server.sendmail(smtp_from, smtp_to, msg.as_bytes(policy=email.policy.SMTP))
+
+
+def get_mock_items(product_name: str):
+    mock_rakuten = Item(
+        name=f"{product_name} サンプル商品 楽天",
+        image_url="https://example.com/rakuten.jpg",
+        price=12345,
+        shipping=0,
+        url="https://example.com/rakuten",
+    )
+    mock_amazon = Item(
+        name=f"{product_name} サンプル商品 Amazon",
+        image_url="https://example.com/amazon.jpg",
+        price=12500,
+        shipping=None,
+        url="https://example.com/amazon",
+    )
+    mock_yahoo = Item(
+        name=f"{product_name} サンプル商品 Yahoo",
+        image_url="https://example.com/yahoo.jpg",
+        price=12000,
+        shipping=500,
+        url="https://example.com/yahoo",
+    )
+    return mock_rakuten, mock_amazon, mock_yahoo
 
 
 def main() -> int:
     load_dotenv()
 
     parser = argparse.ArgumentParser(description="Price diff tool")
-    parser.add_argument("product_name", help="Product name (required)")
+    parser.add_argument(
+        "product_name",
+        nargs="?",
+        help="Product name (required unless --batch is given)",
+    )
+    parser.add_argument(
+        "--batch",
+        type=Path,
+        help="Text file with one product name per line; all results go into one CSV.",
+    )
     parser.add_argument(
         "--exclude-words",
         default="",
@@ -100,34 +256,36 @@ def main() -> int:
         format="%(asctime)s [%(levelname)s] %(message)s",
     )
 
-    product_name = args.product_name.strip()
-    exclude_words = parse_exclude_words(args.exclude_words)
-    logging.info("Start price diff for product_name=%s", product_name)
-
-    session = requests.Session()
+    if args.batch and args.product_name:
+        parser.error("product_name and --batch cannot be used together")
+    if args.batch:
+        product_names = read_product_names(args.batch)
+        if not product_names:
+            parser.error(f"no product names found in {args.batch}")
+        label = args.batch.name
+    elif args.product_name and args.product_name.strip():
+        product_names = [args.product_name.strip()]
+        label = product_names[0]
+    else:
+        parser.error("product_name or --batch is required")
 
-    rakuten_item = None
-    yahoo_item = None
-    amazon_item = None
+    exclude_words = parse_exclude_words(args.exclude_words)
+    logging.info("Start price diff for %s product(s): %s", len(product_names), label)
 
     if args.mock:
         logging.info("Mock mode enabled: using local sample results.")
-        rakuten_item, amazon_item, yahoo_item = get_mock_items(product_name)
+        results = [get_mock_items(name) for name in product_names]
     else:
-        try:
-            rakuten_item = search_rakuten(session, product_name, exclude_words)
-        except Exception as exc:
-            logging.info("Rakuten search failed: %s", exc)
-
-        try:
-            yahoo_item = search_yahoo(session, product_name, exclude_words)
-        except Exception as exc:
-            logging.info("Yahoo search failed: %s", exc)
-
-        try:
-            amazon_item = search_amazon(session, product_name, exclude_words)
-        except Exception as exc:
-            logging.info("Amazon search failed: %s", exc)
+        with build_session() as session:
+            # Models are fetched BATCH_CONCURRENCY at a time. Rakuten and Amazon
+            # calls are serialized and spaced by their own rate limiters.
+            with ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY) as executor:
+                results = list(
+                    executor.map(
+                        lambda name: fetch_items(session, name, exclude_words),
+                        product_names,
+                    )
+                )
 
     timestamp = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
     csv_path = Path(f"{timestamp}_result.csv")
@@ -146,28 +304,11 @@ def main() -> int:
         "Yahoo送料",
         "YahooURL",
     ]
-
-    name = ""
-    image_url = ""
-    for candidate in (rakuten_item, amazon_item, yahoo_item):
-        if candidate and candidate.name:
-            name = candidate.name
-            image_url = candidate.image_url
-            break
-
-    row = [
-        name,
-        product_name,
-        image_url,
-        *item_to_row(rakuten_item),
-        *item_to_row(amazon_item),
-        *item_to_row(yahoo_item),
+    rows = [
+        build_row(name, *items) for name, items in zip(product_names, results)
     ]
 
-    with csv_path.open("w", encoding="shift_jis", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(header)
-        writer.writerow(row)
+    write_csv(csv_path, header, rows)
 
     logging.info("CSV saved: %s", csv_path)
 
@@ -182,21 +323,19 @@ def main() -> int:
         logging.info("SMTP settings missing; skip email sending.")
         return 0
 
-    subject = f"価格取得結果 {product_name} {timestamp}"
-    body = f"商品名 {product_name} の最安値結果を送付します。"
+    subject = f"価格取得結果 {label} {timestamp}"
+    body = f"商品名 {label} の最安値結果を送付します。"
 
     try:
-        send_email(
-            smtp_host=smtp_host,
-            smtp_port=smtp_port,
-            smtp_user=smtp_user,
-            smtp_password=smtp_password,
+        msg = build_email(
             smtp_from=smtp_from,
             smtp_to=smtp_to,
             subject=subject,
             body=body,
             attachment_path=csv_path,
         )
+        with open_smtp(smtp_host, smtp_port, smtp_user, smtp_password) as server:
+            send_email(server, smtp_from, smtp_to, msg)
         logging.info("Email sent.")
     except Exception as exc:
         logging.error("Email send failed: %s", exc)
@@ -207,28 +346,3 @@ def main() -> int:
 
 if __name__ == "__main__":
     raise SystemExit(main())
-
-
-def get_mock_items(product_name: str):
-    mock_rakuten = Item(
-        name=f"{product_name} サンプル商品 楽天",
-        image_url="https://example.com/rakuten.jpg",
-        price=12345,
-        shipping=0,
-        url="https://example.com/rakuten",
-    )
-    mock_amazon = Item(
-        name=f"{product_name} サンプル商品 Amazon",
-        image_url="https://example.com/amazon.jpg",
-        price=12500,
-        shipping=None,
-        url="https://example.com/amazon",
-    )
-    mock_yahoo = Item(
-        name=f"{product_name} サンプル商品 Yahoo",
-        image_url="https://example.com/yahoo.jpg",
-        price=12000,
-        shipping=500,
-        url="https://example.com/yahoo",
-    )
-    return mock_rakuten, mock_amazon, mock_yahoo
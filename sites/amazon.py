@@ -1,34 +1,38 @@
-import datetime as dt
+import functools
 import hashlib
 import hmac
-import json
 import logging
-import os
-from typing import List, Optional
+import time
+from typing import Any, List, Optional
 
+import orjson
 import requests
 
+from .cache import cached_search
+from .env import get_env
+from .exclude import compile_excludes, contains_exclude
+from .ratelimit import rate_limited
 from .types import Item
 
 
-def _contains_exclude(name: str, exclude_words: List[str]) -> bool:
-    lowered = name.lower()
-    return any(word.lower() in lowered for word in exclude_words)
+logger = logging.getLogger(__name__)
 
 
+@cached_search("Amazon")
+@rate_limited(1.0)
 def search_amazon(
     session: requests.Session,
     product_name: str,
     exclude_words: List[str],
 ) -> Optional[Item]:
-    access_key = os.getenv("AMAZON_ACCESS_KEY", "").strip()
-    secret_key = os.getenv("AMAZON_SECRET_KEY", "").strip()
-    partner_tag = os.getenv("AMAZON_PARTNER_TAG", "").strip()
-    host = os.getenv("AMAZON_HOST", "webservices.amazon.co.jp").strip()
-    region = os.getenv("AMAZON_REGION", "ap-northeast-1").strip()
+    access_key = get_env("AMAZON_ACCESS_KEY")
+    secret_key = get_env("AMAZON_SECRET_KEY")
+    partner_tag = get_env("AMAZON_PARTNER_TAG")
+    host = get_env("AMAZON_HOST", "webservices.amazon.co.jp")
+    region = get_env("AMAZON_REGION", "ap-northeast-1")
 
     if not (access_key and secret_key and partner_tag):
-        logging.info("Amazon credentials missing; skip Amazon search.")
+        logger.info("Amazon credentials missing; skip Amazon search.")
         return None
 
     payload = {
@@ -57,29 +61,30 @@ def search_amazon(
             secret_key=secret_key,
             payload=payload,
         )
-        data = response.json()
+        data = orjson.loads(response.content)
     except Exception as exc:
-        logging.info("Amazon API error: %s", exc)
+        logger.info("Amazon API error: %s", exc)
         return None
 
     if "Errors" in data:
-        logging.info("Amazon API error: %s", data.get("Errors"))
+        logger.info("Amazon API error: %s", data.get("Errors"))
         return None
 
-    items = data.get("SearchResult", {}).get("Items", [])
-    logging.info("Amazon items: %s", len(items))
+    items = _deep_get(data, "SearchResult", "Items", default=[])
+    logger.info("Amazon items: %s", len(items))
 
-    best_item = None
+    best = None
     best_price = None
 
+    exclude_pattern = compile_excludes(exclude_words)
     for item in items:
-        title = item.get("ItemInfo", {}).get("Title", {}).get("DisplayValue", "")
-        if not title or _contains_exclude(title, exclude_words):
+        title = _deep_get(item, "ItemInfo", "Title", "DisplayValue", default="")
+        if not title or contains_exclude(title, exclude_pattern):
             continue
         listing = _best_listing(item)
         if not listing:
             continue
-        price = listing.get("Price", {}).get("Amount")
+        price = _deep_get(listing, "Price", "Amount")
         if price is None:
             continue
         try:
@@ -89,40 +94,51 @@ def search_amazon(
 
         if best_price is None or price_int < best_price:
             best_price = price_int
-            best_item = Item(
-                name=title,
-                image_url=_image_url(item),
-                price=price_int,
-                shipping=_shipping_from_listing(listing),
-                url=item.get("DetailPageURL", ""),
-            )
+            best = (title, item, listing)
+
+    best_item = None
+    if best:
+        title, item, listing = best
+        best_item = Item(
+            name=title,
+            image_url=_image_url(item),
+            price=best_price,
+            shipping=_shipping_from_listing(listing),
+            url=item.get("DetailPageURL", ""),
+        )
 
     if best_item:
-        logging.info("Amazon best: %s (%s)", best_item.name, best_item.price)
+        logger.info("Amazon best: %s (%s)", best_item.name, best_item.price)
     else:
-        logging.info("Amazon best: none")
+        logger.info("Amazon best: none")
 
     return best_item
 
 
+def _deep_get(data: Any, *keys: str, default: Any = None) -> Any:
+    # Walks nested dicts without allocating a fallback {} at every level.
+    for key in keys:
+        if not isinstance(data, dict):
+            return default
+        data = data.get(key)
+        if data is None:
+            return default
+    return data
+
+
 def _best_listing(item: dict) -> Optional[dict]:
-    listings = item.get("Offers", {}).get("Listings", [])
+    listings = _deep_get(item, "Offers", "Listings")
     if not listings:
         return None
     return listings[0]
 
 
 def _image_url(item: dict) -> str:
-    return (
-        item.get("Images", {})
-        .get("Primary", {})
-        .get("Medium", {})
-        .get("URL", "")
-    )
+    return _deep_get(item, "Images", "Primary", "Medium", "URL", default="")
 
 
 def _shipping_from_listing(listing: dict) -> Optional[int]:
-    charges = listing.get("DeliveryInfo", {}).get("ShippingCharges")
+    charges = _deep_get(listing, "DeliveryInfo", "ShippingCharges")
     if not charges:
         return None
     amount = charges.get("Amount")
@@ -148,12 +164,16 @@ def _signed_request(
     content_type = "application/json; charset=utf-8"
     amz_target = "com.amazon.paapi5.v1.ProductAdvertisingAPIv1.SearchItems"
 
-    now = dt.datetime.utcnow()
-    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
-    date_stamp = now.strftime("%Y%m%d")
+    now = time.gmtime()
+    amz_date = (
+        f"{now.tm_year:04d}{now.tm_mon:02d}{now.tm_mday:02d}"
+        f"T{now.tm_hour:02d}{now.tm_min:02d}{now.tm_sec:02d}Z"
+    )
+    date_stamp = amz_date[:8]
 
-    payload_str = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
-    payload_hash = hashlib.sha256(payload_str.encode("utf-8")).hexdigest()
+    # orjson emits compact UTF-8 bytes, reused for both the hash and the body.
+    payload_bytes = orjson.dumps(payload)
+    payload_hash = hashlib.sha256(payload_bytes).hexdigest()
 
     canonical_headers = (
         f"content-encoding:utf-8\n"
@@ -186,9 +206,9 @@ def _signed_request(
     )
 
     signing_key = _get_signature_key(secret_key, date_stamp, region, service)
-    signature = hmac.new(
-        signing_key, string_to_sign.encode("utf-8"), hashlib.sha256
-    ).hexdigest()
+    signature = hmac.digest(
+        signing_key, string_to_sign.encode("utf-8"), "sha256"
+    ).hex()
 
     authorization_header = (
         f"{algorithm} Credential={access_key}/{credential_scope}, "
@@ -203,15 +223,18 @@ def _signed_request(
         "Authorization": authorization_header,
     }
 
-    resp = session.post(endpoint, data=payload_str.encode("utf-8"), headers=headers, timeout=20)
+    resp = session.post(endpoint, data=payload_bytes, headers=headers, timeout=20)
     resp.raise_for_status()
     return resp
 
 
 def _sign(key: bytes, msg: str) -> bytes:
-    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+    # hmac.digest() is the one-shot C path; no HMAC object is built per call.
+    return hmac.digest(key, msg.encode("utf-8"), "sha256")
 
 
+# The derived key only changes per UTC day, region and service.
+@functools.lru_cache(maxsize=8)
 def _get_signature_key(key: str, date_stamp: str, region: str, service: str) -> bytes:
     k_date = _sign(("AWS4" + key).encode("utf-8"), date_stamp)
     k_region = _sign(k_date, region)
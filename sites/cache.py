@@ -0,0 +1,81 @@
+import functools
+import hashlib
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import orjson
+import requests
+
+from .types import Item
+
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_DIR = Path.home() / ".cache" / "pricediff"
+CACHE_TTL_SECONDS = 600
+
+SearchFunc = Callable[[requests.Session, str, List[str]], Optional[Item]]
+
+_memory: Dict[str, Tuple[float, Item]] = {}
+
+
+def cached_search(site: str) -> Callable[[SearchFunc], SearchFunc]:
+    def decorator(func: SearchFunc) -> SearchFunc:
+        @functools.wraps(func)
+        def wrapper(
+            session: requests.Session,
+            product_name: str,
+            exclude_words: List[str],
+        ) -> Optional[Item]:
+            key = _cache_key(site, product_name, exclude_words)
+            item = _load(key)
+            if item is not None:
+                logger.info("%s cache hit: %s (%s)", site, item.name, item.price)
+                return item
+            item = func(session, product_name, exclude_words)
+            if item is not None:
+                _store(key, item)
+            return item
+
+        return wrapper
+
+    return decorator
+
+
+def _cache_key(site: str, product_name: str, exclude_words: List[str]) -> str:
+    # Exclusion is case-insensitive and order-independent; key on that form.
+    excludes = sorted({word.lower() for word in exclude_words})
+    raw = orjson.dumps([site, product_name, excludes])
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _load(key: str) -> Optional[Item]:
+    now = time.time()
+    entry = _memory.get(key)
+    if entry and now - entry[0] < CACHE_TTL_SECONDS:
+        return entry[1]
+
+    path = CACHE_DIR / f"{key}.json"
+    try:
+        stored_at = path.stat().st_mtime
+        if now - stored_at >= CACHE_TTL_SECONDS:
+            path.unlink(missing_ok=True)
+            return None
+        item = Item(**orjson.loads(path.read_bytes()))
+    except (OSError, TypeError, ValueError):
+        return None
+
+    _memory[key] = (stored_at, item)
+    return item
+
+
+def _store(key: str, item: Item) -> None:
+    _memory[key] = (time.time(), item)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        (CACHE_DIR / f"{key}.json").write_bytes(orjson.dumps(item))
+    except OSError as exc:
+        logger.info("Cache write failed: %s", exc)
@@ -0,0 +1,17 @@
+import os
+from typing import Dict
+
+
+_values: Dict[str, str] = {}
+
+
+def get_env(name: str, default: str = "") -> str:
+    value = _values.get(name)
+    if value is not None:
+        return value
+    value = os.getenv(name, "").strip()
+    if not value:
+        # Not remembered, so a later load_dotenv() or env change is still seen.
+        return default
+    _values[name] = value
+    return value
@@ -0,0 +1,14 @@
+import re
+from typing import List, Optional, Pattern
+
+
+def compile_excludes(exclude_words: List[str]) -> Optional[Pattern[str]]:
+    if not exclude_words:
+        return None
+    return re.compile("|".join(re.escape(word.lower()) for word in exclude_words))
+
+
+def contains_exclude(name: str, exclude_pattern: Optional[Pattern[str]]) -> bool:
+    if exclude_pattern is None:
+        return False
+    return exclude_pattern.search(name.lower()) is not None
@@ -1,26 +1,29 @@
 import logging
-import os
 from typing import List, Optional
 
+import orjson
 import requests
 
+from .cache import cached_search
+from .env import get_env
+from .exclude import compile_excludes, contains_exclude
+from .ratelimit import rate_limited
 from .types import Item
 
 
 API_URL = "https://app.rakuten.co.jp/services/api/IchibaItem/Search/20220601"
 
-
-def _contains_exclude(name: str, exclude_words: List[str]) -> bool:
-    lowered = name.lower()
-    return any(word.lower() in lowered for word in exclude_words)
+logger = logging.getLogger(__name__)
 
 
+@cached_search("Rakuten")
+@rate_limited(1.0)
 def search_rakuten(
     session: requests.Session,
     product_name: str,
     exclude_words: List[str],
 ) -> Optional[Item]:
-    app_id = os.getenv("RAKUTEN_APP_ID", "").strip()
+    app_id = get_env("RAKUTEN_APP_ID")
     if not app_id:
         raise RuntimeError("RAKUTEN_APP_ID is not set")
 
@@ -35,17 +38,18 @@ def search_rakuten(
 
     resp = session.get(API_URL, params=params, timeout=20)
     resp.raise_for_status()
-    data = resp.json()
+    data = orjson.loads(resp.content)
     items = data.get("Items", [])
-    logging.info("Rakuten items: %s", len(items))
+    logger.info("Rakuten items: %s", len(items))
 
     best_item = None
-    best_price = None
 
+    exclude_pattern = compile_excludes(exclude_words)
+    # Results are sorted by "+itemPrice", so the first usable entry is the cheapest.
     for entry in items:
         item = entry.get("Item", {})
         name = item.get("itemName", "")
-        if not name or _contains_exclude(name, exclude_words):
+        if not name or contains_exclude(name, exclude_pattern):
             continue
         price = item.get("itemPrice")
         if price is None:
@@ -55,20 +59,19 @@ def search_rakuten(
         except (TypeError, ValueError):
             continue
 
-        if best_price is None or price_int < best_price:
-            best_price = price_int
-            best_item = Item(
-                name=name,
-                image_url=_best_image_url(item.get("mediumImageUrls") or []),
-                price=price_int,
-                shipping=_shipping_from_rakuten(item),
-                url=item.get("itemUrl", ""),
-            )
+        best_item = Item(
+            name=name,
+            image_url=_best_image_url(item.get("mediumImageUrls") or []),
+            price=price_int,
+            shipping=_shipping_from_rakuten(item),
+            url=item.get("itemUrl", ""),
+        )
+        break
 
     if best_item:
-        logging.info("Rakuten best: %s (%s)", best_item.name, best_item.price)
+        logger.info("Rakuten best: %s (%s)", best_item.name, best_item.price)
     else:
-        logging.info("Rakuten best: none")
+        logger.info("Rakuten best: none")
 
     return best_item
 
@@ -0,0 +1,31 @@
+import functools
+import threading
+import time
+from typing import Callable, TypeVar
+
+
+F = TypeVar("F", bound=Callable)
+
+
+def rate_limited(interval: float) -> Callable[[F], F]:
+    lock = threading.Lock()
+    next_call = 0.0
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            nonlocal next_call
+            # One call at a time, each starting at least `interval` seconds
+            # after the previous one finished.
+            with lock:
+                wait = next_call - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    next_call = time.monotonic() + interval
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
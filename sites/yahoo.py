@@ -1,77 +1,98 @@
 import logging
-import os
-from typing import List, Optional
+from typing import List, Optional, Pattern, Tuple
 
+import orjson
 import requests
 
+from .cache import cached_search
+from .env import get_env
+from .exclude import compile_excludes, contains_exclude
 from .types import Item
 
 
 API_URL = "https://shopping.yahooapis.jp/ShoppingWebService/V3/itemSearch"
+PAGE_SIZE = 15
+MAX_RESULTS = 30
 
-
-def _contains_exclude(name: str, exclude_words: List[str]) -> bool:
-    lowered = name.lower()
-    return any(word.lower() in lowered for word in exclude_words)
+logger = logging.getLogger(__name__)
 
 
+@cached_search("Yahoo")
 def search_yahoo(
     session: requests.Session,
     product_name: str,
     exclude_words: List[str],
 ) -> Optional[Item]:
-    app_id = os.getenv("YAHOO_APP_ID", "").strip()
+    app_id = get_env("YAHOO_APP_ID")
     if not app_id:
         raise RuntimeError("YAHOO_APP_ID is not set")
 
-    params = {
-        "appid": app_id,
-        "query": product_name,
-        "results": 30,
-        "sort": "+price",
-    }
+    exclude_pattern = compile_excludes(exclude_words)
+    best = None
+    best_price = None
 
-    resp = session.get(API_URL, params=params, timeout=20)
-    resp.raise_for_status()
-    data = resp.json()
-    hits = data.get("hits", [])
-    logging.info("Yahoo items: %s", len(hits))
+    # The next page is only worth fetching when every hit on the current one
+    # was filtered out.
+    for start in range(1, MAX_RESULTS + 1, PAGE_SIZE):
+        params = {
+            "appid": app_id,
+            "query": product_name,
+            "results": PAGE_SIZE,
+            "start": start,
+            "sort": "+price",
+        }
+
+        resp = session.get(API_URL, params=params, timeout=20)
+        resp.raise_for_status()
+        data = orjson.loads(resp.content)
+        hits = data.get("hits", [])
+        logger.debug("Yahoo items: %s (start=%s)", len(hits), start)
+
+        best, best_price = _cheapest_hit(hits, exclude_pattern)
+        if best or len(hits) < PAGE_SIZE:
+            break
 
     best_item = None
-    best_price = None
+    if best:
+        best_item = Item(
+            name=best["name"],
+            image_url=_image_url(best.get("image")),
+            price=best_price,
+            shipping=_shipping_from_yahoo(best),
+            url=best.get("url", ""),
+        )
+
+    if best_item:
+        logger.info("Yahoo best: %s (%s)", best_item.name, best_item.price)
+    else:
+        logger.info("Yahoo best: none")
+
+    return best_item
+
 
+def _cheapest_hit(
+    hits: List[dict],
+    exclude_pattern: Optional[Pattern[str]],
+) -> Tuple[Optional[dict], Optional[int]]:
+    # Hits are sorted by "+price", so the first usable hit is the cheapest.
     for item in hits:
         name = item.get("name", "")
-        if not name or _contains_exclude(name, exclude_words):
+        if not name or contains_exclude(name, exclude_pattern):
             continue
         price = item.get("price")
         if price is None:
             continue
         try:
-            price_int = int(price)
+            return item, int(price)
         except (TypeError, ValueError):
             continue
 
-        if best_price is None or price_int < best_price:
-            best_price = price_int
-            best_item = Item(
-                name=name,
-                image_url=_image_url(item),
-                price=price_int,
-                shipping=_shipping_from_yahoo(item),
-                url=item.get("url", ""),
-            )
-
-    if best_item:
-        logging.info("Yahoo best: %s (%s)", best_item.name, best_item.price)
-    else:
-        logging.info("Yahoo best: none")
-
-    return best_item
+    return None, None
 
 
-def _image_url(item: dict) -> str:
-    image = item.get("image", {})
+def _image_url(image: Optional[dict]) -> str:
+    if not image:
+        return ""
     return image.get("medium") or image.get("small") or ""
 
 